@@ -1,11 +1,21 @@
 from __future__ import annotations
+import heapq
+import math
 import re
+import string
 import time
+from array import array
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Iterable, Iterator, Set, Tuple
 
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
 
@@ -27,6 +37,10 @@ def _resolve_docs_dir() -> Path:
 DOCS_DIR = _resolve_docs_dir()
 MIN_SUMMARY_SENTENCES = 2
 MAX_SNIPPETS_PER_DOC = 3
+MAX_RESULTS = 10
+BM25_K1 = 1.5
+BM25_B = 0.75
+RESPONSE_CACHE_SIZE = 1024
 
 app = FastAPI(title="Legal Search Mock API", version="1.0.0")
 
@@ -67,13 +81,52 @@ class GenerateResponse(BaseModel):
     meta: Dict[str, Any]
 
 
+_SENTENCE_BOUNDARY_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9])")
+_SENTENCE_STARTS = frozenset(string.ascii_uppercase + string.digits)
+_TERMINATORS_AS_DOT = str.maketrans("!?", "..")
+_TOKEN_RE = re.compile(r"[a-zA-Z0-9]+")
+
+
 def _sentence_split(text: str) -> List[str]:
-    parts = re.split(r"(?<=[.!?])\s+(?=[A-Z0-9])", text.strip())
-    return [p.strip() for p in parts if p.strip()]
+    """Split at whitespace that follows [.!?] and precedes [A-Z0-9].
+
+    ASCII text (the common case for the corpus) is scanned by jumping between
+    terminators with str.find, which is a few times faster than the
+    lookaround regex. Anything else goes through the regex, whose whitespace
+    class also covers Unicode spaces.
+    """
+    text = text.strip()
+    if not text.isascii():
+        parts = (p.strip() for p in _SENTENCE_BOUNDARY_RE.split(text))
+        return [p for p in parts if p]
+
+    marks = text.translate(_TERMINATORS_AS_DOT)
+    n = len(text)
+    sentences: List[str] = []
+    start = 0
+    i = marks.find(".")
+    while i != -1:
+        j = i + 1
+        while j < n and text[j].isspace():
+            j += 1
+        if j > i + 1 and j < n and text[j] in _SENTENCE_STARTS:
+            part = text[start : i + 1].strip()
+            if part:
+                sentences.append(part)
+            start = j
+        i = marks.find(".", j)
+    part = text[start:].strip()
+    if part:
+        sentences.append(part)
+    return sentences
 
 
 def _tokenize(text: str) -> List[str]:
-    return re.findall(r"[a-zA-Z0-9]+", text.lower())
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _read_doc_file(file_path: Path) -> str:
+    return file_path.read_text(encoding="utf-8").strip()
 
 
 def _load_docs() -> Dict[str, Dict[str, str]]:
@@ -87,9 +140,13 @@ def _load_docs() -> Dict[str, Dict[str, str]]:
     # Try to load from files first
     if DOCS_DIR.exists():
         txt_files = sorted(DOCS_DIR.glob("*.txt"))
-        for file_path in txt_files:
+        # File reads release the GIL, so overlap them across a thread pool;
+        # results are consumed in sorted order to keep doc order stable.
+        with ThreadPoolExecutor() as executor:
+            futures = [executor.submit(_read_doc_file, fp) for fp in txt_files]
+        for file_path, future in zip(txt_files, futures):
             try:
-                text = file_path.read_text(encoding="utf-8").strip()
+                text = future.result()
                 if text:
                     doc_id = file_path.stem
                     title = doc_id.replace("_", " ").replace("-", " ").title()
@@ -205,61 +262,162 @@ def _load_docs() -> Dict[str, Dict[str, str]]:
 # Initialize documents at startup
 DOCS = _load_docs()
 DOC_SENTENCES = {k: _sentence_split(v["text"]) for k, v in DOCS.items()}
+# Static per-result fields, so building a result is a single lookup.
+DOC_META: Dict[str, Dict[str, Any]] = {
+    k: {"title": v["title"], "fallback_snippets": DOC_SENTENCES[k][:1]} for k, v in DOCS.items()
+}
 
 
-def _score_doc(query_tokens: List[str], text_tokens: List[str]) -> float:
-    if not query_tokens or not text_tokens:
-        return 0.0
-    counts = sum(text_tokens.count(qt) for qt in query_tokens)
-    return counts / max(1, len(text_tokens))
+def _build_token_counts(
+    doc_sentences: Dict[str, List[str]]
+) -> Tuple[Dict[str, Counter], Dict[str, List[Counter]], Dict[str, List[frozenset]]]:
+    """Return per-document token counts plus per-sentence counts and token sets.
 
-
-def _best_snippets(doc_id: str, query_tokens: List[str]) -> List[str]:
+    The intermediate token lists are local, so only the derived tables
+    outlive startup.
+    """
+    doc_tokens: Dict[str, Counter] = {}
+    sent_tokens: Dict[str, List[Counter]] = {}
+    sent_token_sets: Dict[str, List[frozenset]] = {}
+    for doc_id, sents in doc_sentences.items():
+        token_lists = [_tokenize(s) for s in sents]
+        doc_tokens[doc_id] = Counter(chain.from_iterable(token_lists))
+        sent_tokens[doc_id] = [Counter(toks) for toks in token_lists]
+        sent_token_sets[doc_id] = [frozenset(toks) for toks in token_lists]
+    return doc_tokens, sent_tokens, sent_token_sets
+
+
+# Token multisets are query-independent, so build them once here instead of
+# re-tokenizing every document and sentence on each request. Sentence
+# boundaries never fall inside a token, so each sentence is tokenized once and
+# the document counts are derived from those tokens rather than a second pass
+# of the regex over the full text.
+DOC_TOKENS, SENT_TOKENS, SENT_TOKEN_SETS = _build_token_counts(DOC_SENTENCES)
+DOC_LENS: Dict[str, int] = {k: sum(c.values()) for k, c in DOC_TOKENS.items()}
+
+
+def _build_postings(doc_tokens: Dict[str, Counter]) -> Dict[str, List[Tuple[str, int]]]:
+    """Build an inverted index mapping each term to its (doc_id, tf) postings."""
+    postings: Dict[str, List[Tuple[str, int]]] = {}
+    for doc_id, counter in doc_tokens.items():
+        for term, tf in counter.items():
+            postings.setdefault(term, []).append((doc_id, tf))
+    return postings
+
+
+POSTINGS = _build_postings(DOC_TOKENS)
+DF: Counter = Counter({t: len(p) for t, p in POSTINGS.items()})
+AVGDL = sum(DOC_LENS.values()) / max(1, len(DOC_LENS))
+# Lucene-style IDF; the +1 keeps terms that appear in most documents from
+# contributing negative scores on a small corpus.
+IDF: Dict[str, float] = {
+    t: math.log(1 + (len(DOCS) - df + 0.5) / (df + 0.5)) for t, df in DF.items()
+}
+
+
+def _bm25_weight(term: str, doc_id: str, tf: int) -> float:
+    norm = 1 - BM25_B + BM25_B * DOC_LENS[doc_id] / AVGDL
+    return IDF[term] * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+
+
+def _term_row(term: str, postings: List[Tuple[str, int]]) -> Tuple[Tuple[str, ...], array]:
+    doc_ids = tuple(doc_id for doc_id, _ in postings)
+    weights = array("d", (_bm25_weight(term, doc_id, tf) for doc_id, tf in postings))
+    return doc_ids, weights
+
+
+# BM25 contributions only depend on the term and the document, so the whole
+# sparse term-document weight matrix is materialized once; a query is then a
+# sum over the rows of its terms. Each row is stored as parallel doc-id and
+# weight columns, with weights packed into one contiguous float64 buffer
+# instead of a tuple and a float object per posting.
+TERM_WEIGHTS: Dict[str, Tuple[Tuple[str, ...], array]] = {
+    t: _term_row(t, postings) for t, postings in POSTINGS.items()
+}
+
+
+def _bm25_scores(query_terms: Iterable[str]) -> Dict[str, float]:
+    """Score only the documents that contain at least one query term."""
+    scores: Dict[str, float] = {}
+    for t in query_terms:
+        row = TERM_WEIGHTS.get(t)
+        if row is None:
+            continue
+        for doc_id, weight in zip(*row):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight
+    return scores
+
+
+def _best_snippets(doc_id: str, query_counts: Counter) -> List[str]:
     sents = DOC_SENTENCES.get(doc_id, [])
+    q_set = set(query_counts)
     ranked: List[Tuple[int, str]] = []
-    for s in sents:
-        toks = _tokenize(s)
-        hit = sum(toks.count(q) for q in query_tokens)
-        if hit > 0:
+    sent_tokens = zip(SENT_TOKENS.get(doc_id, []), SENT_TOKEN_SETS.get(doc_id, []))
+    for s, (toks, tok_set) in zip(sents, sent_tokens):
+        hit_terms = q_set & tok_set
+        if hit_terms:
+            hit = sum(toks[q] * query_counts[q] for q in hit_terms)
             ranked.append((hit, s))
-    ranked.sort(key=lambda x: (-x[0], len(x[1])))
-    return [s for _, s in ranked[:MAX_SNIPPETS_PER_DOC]]
+    best = heapq.nsmallest(MAX_SNIPPETS_PER_DOC, ranked, key=lambda x: (-x[0], len(x[1])))
+    return [s for _, s in best]
 
 
-def _make_summary(sorted_docs: List[Tuple[str, float]], query_tokens: List[str]) -> str:
+def _ranked_docs(
+    top: List[Tuple[str, float]], scored: List[Tuple[str, float]]
+) -> Iterator[Tuple[str, float]]:
+    """Yield every scored doc in rank order, starting with the heap-selected top.
+
+    The remaining docs are only sorted if iteration gets past `top`. Their
+    order matches a full stable sort of `scored`, ties included.
+    """
+    yield from top
+    if len(scored) > len(top):
+        top_ids = {doc_id for doc_id, _ in top}
+        rest = [item for item in scored if item[0] not in top_ids]
+        rest.sort(key=itemgetter(1), reverse=True)
+        yield from rest
+
+
+def _make_summary(
+    top: List[Tuple[str, float]], scored: List[Tuple[str, float]], query_tokens: List[str]
+) -> str:
     collected: List[str] = []
+    seen: Set[str] = set()
+    q_set = set(query_tokens)
     target_count = max(MIN_SUMMARY_SENTENCES, len(query_tokens))
 
-    for doc_id, _ in sorted_docs:
+    for doc_id, _ in _ranked_docs(top, scored):
         if len(collected) >= target_count:
             break
         sentences = DOC_SENTENCES.get(doc_id, [])
-        for s in sentences:
+        for s, tok_set in zip(sentences, SENT_TOKEN_SETS.get(doc_id, [])):
             if len(collected) >= target_count:
                 break
-            toks = _tokenize(s)
-            if query_tokens and any(q in toks for q in query_tokens):
-                if s not in collected:
+            if not q_set.isdisjoint(tok_set):
+                if s not in seen:
+                    seen.add(s)
                     collected.append(s)
 
-    if len(collected) < target_count and sorted_docs:
-        for doc_id, _ in sorted_docs:
+    if len(collected) < target_count and top:
+        for doc_id, _ in _ranked_docs(top, scored):
             if len(collected) >= target_count:
                 break
             sentences = DOC_SENTENCES.get(doc_id, [])
             for s in sentences:
                 if len(collected) >= target_count:
                     break
-                if s not in collected:
+                if s not in seen:
+                    seen.add(s)
                     collected.append(s)
 
-    if len(collected) < MIN_SUMMARY_SENTENCES and sorted_docs:
-        top_doc = sorted_docs[0][0]
+    if len(collected) < MIN_SUMMARY_SENTENCES and top:
+        top_doc = top[0][0]
         sentences = DOC_SENTENCES.get(top_doc, [])
         for s in sentences:
             if len(collected) >= MIN_SUMMARY_SENTENCES:
                 break
-            if s not in collected:
+            if s not in seen:
+                seen.add(s)
                 collected.append(s)
 
     if not collected and DOC_SENTENCES:
@@ -272,8 +430,43 @@ def _make_summary(sorted_docs: List[Tuple[str, float]], query_tokens: List[str])
     return " ".join(collected) if collected else "No relevant summary could be generated."
 
 
-@app.post("/generate", response_model=GenerateResponse)
-def generate(req: GenerateRequest):
+# LRU cache of computed payloads keyed by normalized query tokens. It is only
+# read and written from the event loop thread, so it needs no lock.
+_RESPONSE_CACHE: "OrderedDict[Tuple[str, ...], Dict[str, Any]]" = OrderedDict()
+
+
+def _compute_generate(query_tokens: Tuple[str, ...]) -> Dict[str, Any]:
+    """Rank documents and build the summary for a normalized query.
+
+    Returns plain dicts rather than response models so cached entries stay
+    cheap to hold and can be shared between requests.
+    """
+    query_counts = Counter(query_tokens)
+
+    scored: List[Tuple[str, float]] = [
+        (doc_id, score) for doc_id, score in _bm25_scores(query_counts).items() if score > 0
+    ]
+
+    top = heapq.nlargest(MAX_RESULTS, scored, key=itemgetter(1))
+    results: List[Dict[str, Any]] = []
+    for doc_id, score in top:
+        meta = DOC_META[doc_id]
+        snippets = _best_snippets(doc_id, query_counts)
+        results.append(
+            {
+                "doc_id": doc_id,
+                "title": meta["title"],
+                "score": round(float(score), 4),
+                "snippets": snippets or meta["fallback_snippets"],
+            }
+        )
+
+    summary = _make_summary(top, scored, list(query_tokens))
+    return {"results": results, "summary": summary}
+
+
+@app.post("/generate", response_model=GenerateResponse, response_class=ORJSONResponse)
+async def generate(req: GenerateRequest):
     if not DOCS:
         raise HTTPException(
             status_code=503,
@@ -284,35 +477,30 @@ def generate(req: GenerateRequest):
     query = (req.query or "").strip()
     if not query:
         raise HTTPException(status_code=400, detail="Query must not be empty.")
-    query_tokens = _tokenize(query)
-
-    scored: List[Tuple[str, float]] = []
-    for doc_id, meta in DOCS.items():
-        score = _score_doc(query_tokens, _tokenize(meta["text"]))
-        if score > 0:
-            scored.append((doc_id, score))
-
-    scored.sort(key=lambda x: x[1], reverse=True)
-    results: List[SearchResult] = []
-    for doc_id, score in scored[:10]:
-        snippets = _best_snippets(doc_id, query_tokens)
-        results.append(
-            SearchResult(
-                doc_id=doc_id,
-                title=DOCS[doc_id]["title"],
-                score=round(float(score), 4),
-                snippets=snippets or DOC_SENTENCES.get(doc_id, [])[:1],
-            )
-        )
-
-    summary = _make_summary(scored, query_tokens)
+    # The key is the query's tokens in order, repeats included: multiplicity
+    # weights snippets and sets the summary length, and term order decides
+    # how tied scores are ranked.
+    key = tuple(_tokenize(query))
+    computed = _RESPONSE_CACHE.get(key)
+    if computed is None:
+        # Ranking is CPU-bound; keep it off the event loop.
+        computed = await run_in_threadpool(_compute_generate, key)
+        _RESPONSE_CACHE[key] = computed
+        if len(_RESPONSE_CACHE) > RESPONSE_CACHE_SIZE:
+            _RESPONSE_CACHE.popitem(last=False)
+    else:
+        _RESPONSE_CACHE.move_to_end(key)
     took_ms = int((time.time() - t0) * 1000)
 
-    return GenerateResponse(
-        query=query,
-        results=results,
-        summary=summary,
-        meta={"took_ms": took_ms, "doc_count": len(DOCS)},
+    # The payload is already built from plain, cached dicts, so serialize it
+    # directly; GenerateResponse still documents the schema in OpenAPI.
+    return ORJSONResponse(
+        {
+            "query": query,
+            "results": computed["results"],
+            "summary": computed["summary"],
+            "meta": {"took_ms": took_ms, "doc_count": len(DOCS)},
+        }
     )
 
 